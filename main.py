@@ -1,227 +1,159 @@
 import pygame
 import sys
-from enum import Enum, auto
 import random
 
-
-class PieceType(Enum):
-    # Types of chess pieces
-    KING = auto()
-    QUEEN = auto()
-    ROOK = auto()
-    BISHOP = auto()
-    KNIGHT = auto()
-    PAWN = auto()
-
-
-class PieceColor(Enum):
-    # Piece colors (sides)
-    WHITE = auto()
-    BLACK = auto()
+import movegen
+from movegen import WHITE, BLACK, KING, QUEEN, ROOK, BISHOP, KNIGHT, PAWN, CASTLING, SQ_TO_ROWCOL, rowcol_to_sq
 
 
 class Piece:
+    __slots__ = ("piece_type", "color", "position")
+
     def __init__(self, piece_type, color, position):
         self.piece_type = piece_type
         self.color = color
         self.position = position
-        self.has_moved = False
 
     def __str__(self):
         # Return a short text like "WK" for White King
-        color_char = 'W' if self.color == PieceColor.WHITE else 'B'
-        piece_map = {
-            PieceType.KING: "K",
-            PieceType.QUEEN: "Q",
-            PieceType.ROOK: "R",
-            PieceType.BISHOP: "B",
-            PieceType.KNIGHT: "N",
-            PieceType.PAWN: "P"
-        }
+        color_char = 'W' if self.color == WHITE else 'B'
+        piece_map = ("K", "Q", "R", "B", "N", "P")
         return f"{color_char}{piece_map[self.piece_type]}"
 
 
 class ChessBoard:
     # Handles game state and rules of chess
     def __init__(self):
-        self.board = [[None for _ in range(8)] for _ in range(8)]
-        self.current_turn = PieceColor.WHITE
+        # Board state lives in bitboards (bit row * 8 + col per square), one per
+        # color and piece type, plus a flat 64-slot list of Piece objects (or None)
+        self.bb = {(color, piece_type): 0 for color in (WHITE, BLACK) for piece_type in range(6)}
+        self.occ_white = 0
+        self.occ_black = 0
+        # Occupancy of all pieces, kept in step by set_piece and move_piece
+        self.occ = 0
+        # Squares a piece has left or landed on; a clear bit under a king or
+        # rook means it has never moved
+        self.moved_mask = 0
+        self.squares = [None] * 64
+        self.current_turn = WHITE
         self.initialize_board()
 
     def initialize_board(self):
         # Set up pawns
         for col in range(8):
-            self.board[1][col] = Piece(PieceType.PAWN, PieceColor.BLACK, (1, col))
-            self.board[6][col] = Piece(PieceType.PAWN, PieceColor.WHITE, (6, col))
+            self.set_piece(rowcol_to_sq(1, col), Piece(PAWN, BLACK, rowcol_to_sq(1, col)))
+            self.set_piece(rowcol_to_sq(6, col), Piece(PAWN, WHITE, rowcol_to_sq(6, col)))
 
         # Set up back row pieces
-        back_row = [
-            PieceType.ROOK, PieceType.KNIGHT, PieceType.BISHOP, PieceType.QUEEN,
-            PieceType.KING, PieceType.BISHOP, PieceType.KNIGHT, PieceType.ROOK
-        ]
+        back_row = [ROOK, KNIGHT, BISHOP, QUEEN, KING, BISHOP, KNIGHT, ROOK]
         for col in range(8):
-            self.board[0][col] = Piece(back_row[col], PieceColor.BLACK, (0, col))
-            self.board[7][col] = Piece(back_row[col], PieceColor.WHITE, (7, col))
+            self.set_piece(rowcol_to_sq(0, col), Piece(back_row[col], BLACK, rowcol_to_sq(0, col)))
+            self.set_piece(rowcol_to_sq(7, col), Piece(back_row[col], WHITE, rowcol_to_sq(7, col)))
 
-    def get_piece(self, row, col):
-        # Return piece at a given position (or None)
-        if 0 <= row < 8 and 0 <= col < 8:
-            return self.board[row][col]
+    def get_piece(self, sq):
+        # Return piece on a square 0..63 (or None)
+        if 0 <= sq < 64:
+            return self.squares[sq]
         return None
 
-    def set_piece(self, row, col, piece):
-        # Place a piece on the board
+    def set_piece(self, sq, piece):
+        # Place a piece on a square (None clears it)
+        old = self.squares[sq]
+        if old:
+            self._toggle_bits(old, 1 << sq)
+            self.occ &= ~(1 << sq)
         if piece:
-            piece.position = (row, col)
-        self.board[row][col] = piece
+            piece.position = sq
+            self._toggle_bits(piece, 1 << sq)
+            self.occ |= 1 << sq
+        self.squares[sq] = piece
+
+    def _toggle_bits(self, piece, mask):
+        # Flip mask in the piece's bitboard and in its side's occupancy
+        self.bb[(piece.color, piece.piece_type)] ^= mask
+        if piece.color == WHITE:
+            self.occ_white ^= mask
+        else:
+            self.occ_black ^= mask
 
-    def move_piece(self, from_pos, to_pos):
+    def move_piece(self, from_sq, to_sq):
         # Move a piece if the move is valid
-        from_row, from_col = from_pos
-        to_row, to_col = to_pos
-        piece = self.get_piece(from_row, from_col)
+        piece = self.get_piece(from_sq)
 
         if not piece:
             return False
         if piece.color != self.current_turn:
             return False
-        if not self.is_valid_move(from_pos, to_pos):
+        if not self.is_valid_move(from_sq, to_sq):
             return False
 
         # Castling
-        if piece.piece_type == PieceType.KING and abs(from_col - to_col) == 2:
-            rook_col = 0 if to_col == 2 else 7
-            rook_target_col = 3 if to_col == 2 else 5
-            rook = self.get_piece(from_row, rook_col)
-            self.set_piece(from_row, rook_col, None)
-            self.set_piece(from_row, rook_target_col, rook)
-            rook.has_moved = True
-
-        # Execute move
-        self.set_piece(from_row, from_col, None)
-        self.set_piece(to_row, to_col, piece)
-        piece.has_moved = True
+        if piece.piece_type == KING and abs(from_sq - to_sq) == 2:
+            row_start = from_sq - from_sq % 8
+            rook_sq = row_start + (0 if to_sq < from_sq else 7)
+            rook_target_sq = row_start + (3 if to_sq < from_sq else 5)
+            rook = self.get_piece(rook_sq)
+            self.set_piece(rook_sq, None)
+            self.set_piece(rook_target_sq, rook)
+            self.moved_mask |= 1 << rook_sq
+
+        # Execute move: drop any captured piece, then toggle the mover's two bits
+        captured = self.squares[to_sq]
+        if captured:
+            self._toggle_bits(captured, 1 << to_sq)
+        self.squares[from_sq] = None
+        self.squares[to_sq] = piece
+        piece.position = to_sq
+        self._toggle_bits(piece, (1 << from_sq) | (1 << to_sq))
+        self.occ ^= (1 << from_sq) if captured else (1 << from_sq) | (1 << to_sq)
+        self.moved_mask |= (1 << from_sq) | (1 << to_sq)
 
         # Pawn promotion
-        if piece.piece_type == PieceType.PAWN and (to_row == 0 or to_row == 7):
-            piece.piece_type = PieceType.QUEEN
+        if piece.piece_type == PAWN and (to_sq < 8 or to_sq >= 56):
+            self.bb[(piece.color, PAWN)] ^= 1 << to_sq
+            self.bb[(piece.color, QUEEN)] ^= 1 << to_sq
+            piece.piece_type = QUEEN
 
         # Switch turns
-        self.current_turn = PieceColor.BLACK if self.current_turn == PieceColor.WHITE else PieceColor.WHITE
+        self.current_turn ^= 1
         return True
 
-    def is_valid_move(self, from_pos, to_pos):
+    def is_valid_move(self, from_sq, to_sq):
         # Check if a move is legal for a piece
-        piece = self.get_piece(*from_pos)
-        target = self.get_piece(*to_pos)
+        if not (0 <= from_sq < 64 and 0 <= to_sq < 64):
+            return False
 
+        piece = self.squares[from_sq]
         if not piece:
             return False
+        target = self.squares[to_sq]
         if target and target.color == piece.color:
             return False
 
-        if piece.piece_type == PieceType.PAWN:
-            return self._validate_pawn(from_pos, to_pos)
-        if piece.piece_type == PieceType.KNIGHT:
-            return self._validate_knight(from_pos, to_pos)
-        if piece.piece_type == PieceType.BISHOP:
-            return self._validate_bishop(from_pos, to_pos)
-        if piece.piece_type == PieceType.ROOK:
-            return self._validate_rook(from_pos, to_pos)
-        if piece.piece_type == PieceType.QUEEN:
-            return self._validate_queen(from_pos, to_pos)
-        if piece.piece_type == PieceType.KING:
-            return self._validate_king(from_pos, to_pos)
-        return False
-
-    def _validate_pawn(self, from_pos, to_pos):
-        # Validate pawn moves including forward, double, and capture
-        from_row, from_col = from_pos
-        to_row, to_col = to_pos
-        piece = self.get_piece(from_row, from_col)
-        direction = -1 if piece.color == PieceColor.WHITE else 1
-
-        # One square forward
-        if from_col == to_col and to_row == from_row + direction:
-            return self.get_piece(to_row, to_col) is None
-
-        # Double move from starting position
-        if from_col == to_col:
-            if (piece.color == PieceColor.WHITE and from_row == 6 and to_row == 4) or \
-               (piece.color == PieceColor.BLACK and from_row == 1 and to_row == 3):
-                return self.get_piece(from_row + direction, from_col) is None and \
-                       self.get_piece(to_row, to_col) is None
-
-        # Diagonal capture
-        if abs(to_col - from_col) == 1 and to_row == from_row + direction:
-            target = self.get_piece(to_row, to_col)
-            return target is not None and target.color != piece.color
-
-        return False
-
-    def _validate_knight(self, from_pos, to_pos):
-        # Knight L-shaped moves
-        dr, dc = abs(to_pos[0] - from_pos[0]), abs(to_pos[1] - from_pos[1])
-        return (dr, dc) in [(2, 1), (1, 2)]
-
-    def _validate_bishop(self, from_pos, to_pos):
-        # Bishop diagonal moves (no jumping)
-        fr, fc = from_pos
-        tr, tc = to_pos
-        if abs(tr - fr) != abs(tc - fc):
+        enemy_occ = self.occ_black if piece.color == WHITE else self.occ_white
+        if movegen.is_valid_move(self.occ, enemy_occ, from_sq, to_sq, piece.piece_type, piece.color):
+            return True
+        return piece.piece_type == KING and self._validate_castling(from_sq, to_sq)
+
+    def iter_valid_moves(self, color):
+        # Yield every valid (from_sq, to_sq) pair for one side, without building a list
+        for piece in self.squares:
+            if not piece or piece.color != color:
+                continue
+            for to_sq in range(64):
+                if self.is_valid_move(piece.position, to_sq):
+                    yield piece.position, to_sq
+
+    def _validate_castling(self, from_sq, to_sq):
+        # King castles two squares toward an unmoved rook with nothing in between
+        if (self.moved_mask >> from_sq) & 1 or abs(to_sq - from_sq) != 2 or to_sq not in CASTLING:
             return False
-        row_step = 1 if tr > fr else -1
-        col_step = 1 if tc > fc else -1
-        r, c = fr + row_step, fc + col_step
-        while (r, c) != (tr, tc):
-            if self.get_piece(r, c):
-                return False
-            r += row_step
-            c += col_step
-        return True
 
-    def _validate_rook(self, from_pos, to_pos):
-        # Rook straight moves (no jumping)
-        fr, fc = from_pos
-        tr, tc = to_pos
-        if fr != tr and fc != tc:
+        rook_sq, empty_mask = CASTLING[to_sq]
+        rook = self.squares[rook_sq]
+        if not rook or rook.piece_type != ROOK or (self.moved_mask >> rook_sq) & 1:
             return False
-        if fr == tr:  # horizontal
-            for c in range(min(fc, tc) + 1, max(fc, tc)):
-                if self.get_piece(fr, c):
-                    return False
-        else:  # vertical
-            for r in range(min(fr, tr) + 1, max(fr, tr)):
-                if self.get_piece(r, fc):
-                    return False
-        return True
-
-    def _validate_queen(self, from_pos, to_pos):
-        # Queen moves like rook or bishop
-        return self._validate_bishop(from_pos, to_pos) or self._validate_rook(from_pos, to_pos)
-
-    def _validate_king(self, from_pos, to_pos):
-        # King moves one square or castles
-        fr, fc = from_pos
-        tr, tc = to_pos
-        piece = self.get_piece(fr, fc)
-
-        # Normal one-square move
-        if abs(tr - fr) <= 1 and abs(tc - fc) <= 1:
-            return True
-
-        # Castling
-        if not piece.has_moved and fr == tr and abs(tc - fc) == 2:
-            rook_col = 0 if tc < fc else 7
-            rook = self.get_piece(fr, rook_col)
-            if not rook or rook.piece_type != PieceType.ROOK or rook.has_moved:
-                return False
-            for c in range(min(fc, rook_col) + 1, max(fc, rook_col)):
-                if self.get_piece(fr, c):
-                    return False
-            return True
-
-        return False
+        return (empty_mask & self.occ) == 0
 
 
 class ChessGame:
@@ -235,117 +167,175 @@ class ChessGame:
 
         self.board = ChessBoard()
         self.selected_piece = None
+        self._highlight_squares = set()
         self.images = {}
         self._load_images()
 
-        self.game_over = False
-        self.message = ""
-        self.computer_player = PieceColor.BLACK
-
-    def _load_images(self):
-        # Create simple placeholders for pieces
-        pieces = {
-            "WK": "white_king", "WQ": "white_queen", "WR": "white_rook",
-            "WB": "white_bishop", "WN": "white_knight", "WP": "white_pawn",
-            "BK": "black_king", "BQ": "black_queen", "BR": "black_rook",
-            "BB": "black_bishop", "BN": "black_knight", "BP": "black_pawn"
-        }
-        font = pygame.font.SysFont("Arial", 36)
-        for key in pieces:
-            fg_color = (255, 255, 255) if key.startswith("W") else (0, 0, 0)
-            bg_color = (100, 100, 100) if key.startswith("W") else (200, 200, 200)
-            surface = pygame.Surface((self.square_size, self.square_size))
-            surface.fill(bg_color)
-            text = font.render(key[1], True, fg_color)
-            surface.blit(text, text.get_rect(center=(self.square_size // 2, self.square_size // 2)))
-            self.images[key] = surface
-
-    def draw_board(self):
-        # Draw board, pieces, highlights, and messages
-        self.screen.fill((255, 255, 255))
-
+        # The checkerboard never changes, so it is drawn once
+        self._checker = pygame.Surface((self.screen_size, self.screen_size))
         for row in range(8):
             for col in range(8):
                 square_color = (240, 217, 181) if (row + col) % 2 == 0 else (181, 136, 99)
                 pygame.draw.rect(
-                    self.screen,
+                    self._checker,
                     square_color,
                     (col * self.square_size, row * self.square_size,
                      self.square_size, self.square_size)
                 )
 
-                # Highlight valid moves
-                if self.selected_piece:
-                    sr, sc = self.selected_piece
-                    if self.board.is_valid_move((sr, sc), (row, col)):
-                        highlight = pygame.Surface((self.square_size, self.square_size), pygame.SRCALPHA)
-                        highlight.fill((124, 252, 0, 128))
-                        self.screen.blit(highlight, (col * self.square_size, row * self.square_size))
-
-                # Draw piece
-                piece = self.board.get_piece(row, col)
-                if piece:
-                    self.screen.blit(
-                        self.images[str(piece)],
-                        (col * self.square_size, row * self.square_size)
-                    )
+        # Board and pieces only change after a move, so they are cached
+        self._static_layer = pygame.Surface((self.screen_size, self.screen_size))
+        self._static_dirty = True
+
+        # Screen areas changed since the last display update, and the squares
+        # currently carrying a highlight or selection border
+        self._dirty_rects = []
+        self._drawn_overlay = set()
+
+        # Overlays are allocated once and reused every frame
+        self._highlight_surf = pygame.Surface((self.square_size, self.square_size), pygame.SRCALPHA)
+        self._highlight_surf.fill((124, 252, 0, 128))
+        self._endgame_overlay = pygame.Surface((self.screen_size, 100), pygame.SRCALPHA)
+        self._endgame_overlay.fill((0, 0, 0, 180))
+        self._endgame_font = pygame.font.SysFont("Arial", 48)
+        self._msg_surface = None
+
+        self.game_over = False
+        self.message = ""
+        self.computer_player = BLACK
+
+    def _load_images(self):
+        # Create simple placeholders for pieces, keyed by (color, piece_type)
+        font = pygame.font.SysFont("Arial", 36)
+        for color in (WHITE, BLACK):
+            fg_color = (255, 255, 255) if color == WHITE else (0, 0, 0)
+            bg_color = (100, 100, 100) if color == WHITE else (200, 200, 200)
+            for piece_type, letter in enumerate("KQRBNP"):
+                surface = pygame.Surface((self.square_size, self.square_size))
+                surface.fill(bg_color)
+                text = font.render(letter, True, fg_color)
+                surface.blit(text, text.get_rect(center=(self.square_size // 2, self.square_size // 2)))
+                self.images[(color, piece_type)] = surface
+
+    def _render_static(self):
+        # Redraw squares and pieces into the cached layer
+        layer = self._static_layer
+        layer.blit(self._checker, (0, 0))
+
+        for sq in range(64):
+            # Draw piece
+            piece = self.board.get_piece(sq)
+            if piece:
+                layer.blit(self.images[(piece.color, piece.piece_type)], self._square_rect(sq))
+        self._static_dirty = False
+
+    def _square_rect(self, sq):
+        # Screen area covered by one board square
+        row, col = SQ_TO_ROWCOL[sq]
+        return pygame.Rect(col * self.square_size, row * self.square_size, self.square_size, self.square_size)
+
+    def draw_board(self):
+        # Draw board, pieces, highlights, and messages, recording changed areas in _dirty_rects
+        overlay = set(self._highlight_squares)
+        if self.selected_piece is not None:
+            overlay.add(self.selected_piece)
+
+        band = self._endgame_overlay.get_rect(topleft=(0, self.screen_size // 2 - 50))
+        if self._static_dirty:
+            self._render_static()
+            self.screen.blit(self._static_layer, (0, 0))
+            self._dirty_rects.append(self.screen.get_rect())
+            changed = overlay
+            band_repainted = True
+        else:
+            # Restore only the squares whose highlight appeared or disappeared
+            changed = overlay ^ self._drawn_overlay
+            band_repainted = self.game_over and any(band.colliderect(self._square_rect(sq)) for sq in changed)
+            if band_repainted:
+                # The band is translucent, so restore every square under it before redrawing it
+                changed |= {sq for sq in range(64) if band.colliderect(self._square_rect(sq))}
+            for sq in changed:
+                rect = self._square_rect(sq)
+                self.screen.blit(self._static_layer, rect, rect)
+                self._dirty_rects.append(rect)
+        self._drawn_overlay = overlay
+
+        # Highlight valid moves
+        for sq in changed & self._highlight_squares:
+            self.screen.blit(self._highlight_surf, self._square_rect(sq))
 
         # Highlight selected piece
-        if self.selected_piece:
-            sr, sc = self.selected_piece
-            pygame.draw.rect(
-                self.screen, (255, 255, 0),
-                (sc * self.square_size, sr * self.square_size,
-                 self.square_size, self.square_size), 3
+        if self.selected_piece in changed:
+            pygame.draw.rect(self.screen, (255, 255, 0), self._square_rect(self.selected_piece), 3)
+
+        # Show endgame message over anything redrawn beneath it
+        if self.game_over and band_repainted:
+            self.screen.blit(self._endgame_overlay, band)
+            self.screen.blit(
+                self._msg_surface,
+                self._msg_surface.get_rect(center=(self.screen_size // 2, self.screen_size // 2))
             )
-
-        # Show endgame message
-        if self.game_over:
-            font = pygame.font.SysFont("Arial", 48)
-            text = font.render(self.message, True, (255, 0, 0))
-            overlay = pygame.Surface((self.screen_size, 100), pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 180))
-            self.screen.blit(overlay, (0, self.screen_size // 2 - 50))
-            self.screen.blit(text, text.get_rect(center=(self.screen_size // 2, self.screen_size // 2)))
+            self._dirty_rects.append(band)
 
     def handle_click(self, pos):
         # Handle mouse clicks for selecting and moving pieces
         if self.game_over:
             return
 
-        col, row = pos[0] // self.square_size, pos[1] // self.square_size
-        if self.selected_piece:
-            if self.board.move_piece(self.selected_piece, (row, col)):
+        sq = rowcol_to_sq(pos[1] // self.square_size, pos[0] // self.square_size)
+        if self.selected_piece is not None:
+            if self.board.move_piece(self.selected_piece, sq):
                 self.selected_piece = None
+                self._static_dirty = True
                 self.check_game_state()
                 if not self.game_over:
                     self.computer_move()
             else:
-                piece = self.board.get_piece(row, col)
-                self.selected_piece = (row, col) if piece and piece.color == self.board.current_turn else None
+                piece = self.board.get_piece(sq)
+                self.selected_piece = sq if piece and piece.color == self.board.current_turn else None
         else:
-            piece = self.board.get_piece(row, col)
+            piece = self.board.get_piece(sq)
             if piece and piece.color == self.board.current_turn:
-                self.selected_piece = (row, col)
+                self.selected_piece = sq
+        self._update_highlights()
+
+    def _update_highlights(self):
+        # Cache the selected piece's valid destinations so frames don't revalidate them
+        if self.selected_piece is not None:
+            self._highlight_squares = {
+                sq for sq in range(64) if self.board.is_valid_move(self.selected_piece, sq)
+            }
+        else:
+            self._highlight_squares = set()
 
     def computer_move(self):
-        # Make a random move for the computer
-        moves = self.board.get_all_valid_moves(self.computer_player)
-        if moves:
-            from_pos, to_pos = random.choice(moves)
-            self.board.move_piece(from_pos, to_pos)
+        # Make a random move for the computer, sampled uniformly while generating
+        chosen = None
+        count = 0
+        for move in self.board.iter_valid_moves(self.computer_player):
+            count += 1
+            if random.randrange(count) == 0:
+                chosen = move
+        if chosen:
+            from_sq, to_sq = chosen
+            self.board.move_piece(from_sq, to_sq)
+            self._static_dirty = True
             self.check_game_state()
 
     def check_game_state(self):
         # Detect checkmate or stalemate
         if self.board.is_checkmate():
-            winner = "White" if self.board.current_turn == PieceColor.BLACK else "Black"
+            winner = "White" if self.board.current_turn == BLACK else "Black"
             self.message = f"{winner} wins by checkmate!"
             self.game_over = True
         elif self.board.is_stalemate():
             self.message = "Stalemate! It's a draw."
             self.game_over = True
 
+        # Render the endgame text once instead of every frame
+        if self.game_over:
+            self._msg_surface = self._endgame_font.render(self.message, True, (255, 0, 0))
+
     def run(self):
         # Main game loop
         clock = pygame.time.Clock()
@@ -356,9 +346,14 @@ class ChessGame:
                     running = False
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     self.handle_click(event.pos)
+                elif event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                    # The window lost its pixels; the screen surface still holds the full frame
+                    pygame.display.update()
 
             self.draw_board()
-            pygame.display.flip()
+            if self._dirty_rects:
+                pygame.display.update(self._dirty_rects)
+                self._dirty_rects = []
             clock.tick(30)
 
         pygame.quit()
@@ -0,0 +1,156 @@
+# Move rules on plain ints: squares are 0..63 (row * 8 + col) and board
+# occupancy is a 64-bit bitboard, so nothing here touches Piece objects
+
+
+# Square <-> (row, col) conversion; SQ_TO_ROWCOL is precomputed so lookups
+# reuse existing tuples
+SQ_TO_ROWCOL = tuple(divmod(sq, 8) for sq in range(64))
+
+
+def rowcol_to_sq(row, col):
+    # Square index of a (row, col) position
+    return row * 8 + col
+
+
+# Piece colors (sides)
+WHITE, BLACK = 0, 1
+
+# Types of chess pieces
+KING, QUEEN, ROOK, BISHOP, KNIGHT, PAWN = range(6)
+
+
+def _step_attacks(deltas):
+    # For each square, the bitmask of squares one (row, col) step away
+    attacks = []
+    for sq in range(64):
+        row, col = divmod(sq, 8)
+        mask = 0
+        for dr, dc in deltas:
+            r, c = row + dr, col + dc
+            if 0 <= r < 8 and 0 <= c < 8:
+                mask |= 1 << (r * 8 + c)
+        attacks.append(mask)
+    return tuple(attacks)
+
+
+# Attack tables indexed by from-square (bit row * 8 + col)
+KNIGHT_ATTACKS = _step_attacks([(2, 1), (1, 2), (-1, 2), (-2, 1), (-2, -1), (-1, -2), (1, -2), (2, -1)])
+KING_ATTACKS = _step_attacks([(dr, dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1) if dr or dc])
+
+
+def _pawn_pushes(step, start_row):
+    # Single pushes, plus the double push from the starting rank
+    pushes = list(_step_attacks([(step, 0)]))
+    for col in range(8):
+        pushes[start_row * 8 + col] |= 1 << ((start_row + 2 * step) * 8 + col)
+    return tuple(pushes)
+
+
+# Pawn tables indexed by [color][from-square]
+PAWN_PUSHES = (_pawn_pushes(-1, 6), _pawn_pushes(1, 1))
+PAWN_CAPTURES = (_step_attacks([(-1, -1), (-1, 1)]), _step_attacks([(1, -1), (1, 1)]))
+
+# Squares between king and rook that must be empty to castle
+CASTLE_KS_EMPTY_W = (1 << 61) | (1 << 62)
+CASTLE_QS_EMPTY_W = (1 << 57) | (1 << 58) | (1 << 59)
+CASTLE_KS_EMPTY_B = (1 << 5) | (1 << 6)
+CASTLE_QS_EMPTY_B = (1 << 1) | (1 << 2) | (1 << 3)
+
+# Castling keyed by the king's destination: (rook square, squares that must be empty)
+CASTLING = {
+    62: (63, CASTLE_KS_EMPTY_W),
+    58: (56, CASTLE_QS_EMPTY_W),
+    6: (7, CASTLE_KS_EMPTY_B),
+    2: (0, CASTLE_QS_EMPTY_B),
+}
+
+# Kinds of line two squares can share, as flags in RAY_ALIGN
+ORTHOGONAL, DIAGONAL = 1, 2
+
+
+def _build_rays():
+    # BETWEEN[a][b] is the bitmask of squares strictly between a and b on a
+    # shared rank, file or diagonal; RAY_ALIGN[a][b] is that line's kind (0 if none)
+    between = [[0] * 64 for _ in range(64)]
+    align = [[0] * 64 for _ in range(64)]
+    directions = [(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (1, -1), (-1, 1), (-1, -1)]
+    for from_sq in range(64):
+        from_row, from_col = divmod(from_sq, 8)
+        for dr, dc in directions:
+            kind = DIAGONAL if dr and dc else ORTHOGONAL
+            r, c = from_row + dr, from_col + dc
+            mask = 0
+            while 0 <= r < 8 and 0 <= c < 8:
+                between[from_sq][r * 8 + c] = mask
+                align[from_sq][r * 8 + c] = kind
+                mask |= 1 << (r * 8 + c)
+                r += dr
+                c += dc
+    return tuple(map(tuple, between)), tuple(map(tuple, align))
+
+
+BETWEEN, RAY_ALIGN = _build_rays()
+
+
+def validate_pawn(occ, enemy_occ, from_sq, to_sq, color):
+    # Pawn moves including forward, double, and capture
+    to_bit = 1 << to_sq
+
+    # One or two squares forward, through empty squares only
+    if PAWN_PUSHES[color][from_sq] & to_bit:
+        return not (BETWEEN[from_sq][to_sq] | to_bit) & occ
+
+    # Diagonal capture
+    if PAWN_CAPTURES[color][from_sq] & to_bit:
+        return bool(to_bit & enemy_occ)
+
+    return False
+
+
+def validate_knight(occ, enemy_occ, from_sq, to_sq, color):
+    # Knight L-shaped moves
+    return bool(KNIGHT_ATTACKS[from_sq] & (1 << to_sq))
+
+
+def validate_bishop(occ, enemy_occ, from_sq, to_sq, color):
+    # Bishop diagonal moves (no jumping)
+    return _validate_slider(occ, from_sq, to_sq, DIAGONAL)
+
+
+def validate_rook(occ, enemy_occ, from_sq, to_sq, color):
+    # Rook straight moves (no jumping)
+    return _validate_slider(occ, from_sq, to_sq, ORTHOGONAL)
+
+
+def validate_queen(occ, enemy_occ, from_sq, to_sq, color):
+    # Queen moves like rook or bishop
+    return _validate_slider(occ, from_sq, to_sq, ORTHOGONAL | DIAGONAL)
+
+
+def _validate_slider(occ, from_sq, to_sq, kinds):
+    # Move along a line of an allowed kind with no piece strictly in between
+    if not RAY_ALIGN[from_sq][to_sq] & kinds:
+        return False
+    return (BETWEEN[from_sq][to_sq] & occ) == 0
+
+
+def validate_king(occ, enemy_occ, from_sq, to_sq, color):
+    # King one-square moves (castling needs move history and is left to the board)
+    return bool(KING_ATTACKS[from_sq] & (1 << to_sq))
+
+
+# Per-piece-type validators, indexed by piece type
+VALIDATORS = {
+    KING: validate_king,
+    QUEEN: validate_queen,
+    ROOK: validate_rook,
+    BISHOP: validate_bishop,
+    KNIGHT: validate_knight,
+    PAWN: validate_pawn,
+}
+
+
+def is_valid_move(occ, enemy_occ, from_sq, to_sq, piece_type, color):
+    # Check a move against the piece's movement rules; the caller has already
+    # rejected off-board squares and targets holding a piece of the same color
+    return VALIDATORS[piece_type](occ, enemy_occ, from_sq, to_sq, color)